@@ -5,19 +5,36 @@ Searches session metadata and conversation content across all Claude Code
 projects. Outputs structured JSON for consumption by the recall skill agent.
 
 Requires: Python 3.8+, no external dependencies.
-Optional: ripgrep (rg) for faster content search.
+Optional: ripgrep (rg) for faster content search, orjson for faster parsing.
 """
 
 import argparse
+import collections
+import concurrent.futures
+import functools
 import json
+import mmap
+import operator
 import os
+import re
+import shutil
+import sqlite3
 import subprocess
 import sys
+import tempfile
+from array import array
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
 # typing imports compatible with 3.8
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 DEFAULT_CLAUDE_DIR = Path.home() / ".claude"
 
@@ -27,21 +44,43 @@ CONVERSATION_TYPES = {"user", "assistant", "message"}
 # Message types that are noise for search purposes
 NOISE_TYPES = {"progress", "bash_progress", "hook_progress", "file-history-snapshot"}
 
+# Raw line prefixes of noise messages that lead with their type field, so
+# they can be dropped before JSON parsing (compact and spaced separators)
+_NOISE_LINE_PREFIXES = tuple(
+    fmt.format(t) for t in sorted(NOISE_TYPES) for fmt in ('{{"type":"{}"', '{{"type": "{}"')
+)
+_NOISE_LINE_PREFIXES_BYTES = tuple(p.encode("ascii") for p in _NOISE_LINE_PREFIXES)
+
+# Read buffer for JSONL scans — large sessions run to tens of MB
+READ_BUFFER_SIZE = 1 << 20
+
+# bytes.translate table folding ASCII A-Z to a-z
+_ASCII_LOWER = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz"
+)
+
+# Sidecar next to each session file holding its line start offsets
+OFFSETS_SUFFIX = ".offsets"
+
+# Full-text index of conversation messages, kept under the Claude dir
+FTS_INDEX_NAME = ".recall-fts.sqlite"
+
+# The trigram tokenizer can only MATCH queries of at least this many chars;
+# shorter ones scan the stored message text with LIKE instead
+FTS_MIN_QUERY_LEN = 3
+
 
 # ---------------------------------------------------------------------------
 # Tool detection
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=1)
 def detect_search_tool():
     # type: () -> str
-    """Detect best available text search tool."""
-    try:
-        subprocess.run(
-            ["rg", "--version"], capture_output=True, check=True, timeout=5
-        )
+    """Detect best available text search tool (once per process)."""
+    # A PATH lookup is enough for rg; no need to fork a version probe
+    if shutil.which("rg"):
         return "rg"
-    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
-        pass
 
     try:
         result = subprocess.run(
@@ -55,41 +94,79 @@ def detect_search_tool():
     return "grep-bsd"
 
 
+def _search_env(query):
+    # type: (str) -> Dict[str, str]
+    """Environment for rg/grep subprocesses.
+
+    ASCII queries run under LC_ALL=C so grep skips multibyte case folding;
+    non-ASCII queries keep the user's locale so `-i` still folds them.
+    """
+    env = dict(os.environ)
+    if all(ord(c) < 128 for c in query):
+        env["LC_ALL"] = "C"
+    return env
+
+
 # ---------------------------------------------------------------------------
 # Timestamp formatting
 # ---------------------------------------------------------------------------
 
-def format_timestamp(iso_str, now=None):
-    # type: (str, Optional[datetime]) -> str
-    """Format ISO timestamp as 'Feb 10 7:30p (4 days ago)' style.
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# fromisoformat() accepts a trailing "Z" from Python 3.11 on
+_FROMISO_ACCEPTS_Z = sys.version_info >= (3, 11)
 
-    - Always shows date + time
-    - Relative '(Nd ago)' only for < 14 days
-    """
-    if now is None:
-        now = datetime.now(timezone.utc)
 
+@functools.lru_cache(maxsize=4096)
+def _parse_and_format_abs(iso_str):
+    # type: (str) -> Optional[Tuple[datetime, str]]
+    """Parse an ISO timestamp and format its absolute part ('Feb 10  7:30p').
+
+    Returns None if it can't be parsed. Only depends on iso_str, so it is
+    cached; the relative part is recomputed against `now` on every call.
+    """
     try:
-        if iso_str.endswith("Z"):
-            dt = datetime.fromisoformat(iso_str.replace("Z", "+00:00"))
+        if iso_str.endswith("Z") and not _FROMISO_ACCEPTS_Z:
+            dt = datetime.fromisoformat(iso_str[:-1] + "+00:00")
         else:
             dt = datetime.fromisoformat(iso_str)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
     except (ValueError, AttributeError, TypeError):
-        return str(iso_str)
+        return None
 
-    # "Feb 10" — use dt.day to avoid platform-specific strftime flags
-    month = dt.strftime("%b")
-    date_str = "{} {}".format(month, dt.day)
+    # "Feb 10" — index months directly to avoid locale-dependent strftime
+    date_str = "{} {}".format(_MONTHS[dt.month - 1], dt.day)
 
     # "7:30p"
     hour = dt.hour % 12
     if hour == 0:
         hour = 12
-    minute = dt.strftime("%M")
     ampm = "a" if dt.hour < 12 else "p"
-    time_str = "{}:{}{}".format(hour, minute, ampm)
+    time_str = "{}:{:02d}{}".format(hour, dt.minute, ampm)
+
+    return dt, "{}  {}".format(date_str, time_str)
+
+
+def format_timestamp(iso_str, now=None):
+    # type: (str, Optional[datetime]) -> str
+    """Format ISO timestamp as 'Feb 10 7:30p (4 days ago)' style.
+
+    - Always shows date + time
+    - Relative '(Nd ago)' only for < 14 days
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    try:
+        parsed = _parse_and_format_abs(iso_str)
+    except TypeError:
+        # Unhashable input can't go through the cache
+        parsed = None
+    if parsed is None:
+        return str(iso_str)
+    dt, abs_str = parsed
 
     # Relative time (only < 14 days)
     delta = now - dt
@@ -111,13 +188,19 @@ def format_timestamp(iso_str, now=None):
     elif 1 < days < 14:
         relative = " ({}d ago)".format(days)
 
-    return "{}  {}{}".format(date_str, time_str, relative)
+    return abs_str + relative
 
 
 # ---------------------------------------------------------------------------
 # Project helpers
 # ---------------------------------------------------------------------------
 
+def _file_stem(path):
+    # type: (str) -> str
+    """Path(path).stem without building a Path object."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
 def resolve_project_name(project_path):
     # type: (str) -> str
     """Extract human-readable project name from path."""
@@ -142,30 +225,83 @@ def _load_session_index(project_dir):
     if not index_file.exists():
         return None
     try:
-        with open(str(index_file), "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError, OSError):
+        with open(str(index_file), "rb") as f:
+            return _json_loads(f.read())
+    except (ValueError, IOError, OSError):
         return None
 
 
-def _iter_project_dirs(claude_dir):
-    # type: (Path) -> List[Tuple[Path, str, str]]
-    """Iterate project directories, yielding (dir, project_name, project_path)."""
+def _index_entries_by_stem(index_data):
+    # type: (Optional[Dict]) -> Dict[str, Dict]
+    """Map session IDs and fullPath stems to their index entries.
+
+    The first entry claiming a key wins, matching a linear scan in order.
+    """
+    by_stem = {}  # type: Dict[str, Dict]
+    if not index_data:
+        return by_stem
+    for entry in index_data.get("entries", []):
+        by_stem.setdefault(entry.get("sessionId", ""), entry)
+        full = entry.get("fullPath", "")
+        if full:
+            by_stem.setdefault(_file_stem(full), entry)
+    return by_stem
+
+
+@functools.lru_cache(maxsize=None)
+def _read_session_index(project_dir_str, mtime_ns):
+    # type: (str, int) -> Tuple[Optional[Dict], Dict[str, Dict]]
+    """Parse a sessions-index.json once per (path, mtime) pair."""
+    index = _load_session_index(Path(project_dir_str))
+    return index, _index_entries_by_stem(index)
+
+
+def _load_session_index_cached(project_dir_str):
+    # type: (str) -> Tuple[Optional[Dict], Dict[str, Dict]]
+    """Load sessions-index.json, reusing the parsed result while it is unchanged.
+
+    Returns (index, entries_by_stem); both are shared between callers and
+    must not be mutated.
+    """
+    index_file = os.path.join(project_dir_str, "sessions-index.json")
+    try:
+        mtime_ns = os.stat(index_file).st_mtime_ns
+    except OSError:
+        return None, {}
+    return _read_session_index(project_dir_str, mtime_ns)
+
+
+def _iter_project_dirs(claude_dir, only=None):
+    # type: (Path, Optional[Set[str]]) -> List[Tuple[Path, str, str, Optional[Dict]]]
+    """Iterate project directories, yielding (dir, project_name, project_path, index).
+
+    If only is given, directories whose path isn't in it are skipped before
+    their index is loaded.
+    """
     projects_dir = claude_dir / "projects"
     if not projects_dir.exists():
         return []
 
+    with os.scandir(str(projects_dir)) as it:
+        project_dirs = [
+            Path(de.path) for de in it
+            if de.is_dir() and (only is None or de.path in only)
+        ]
+
+    # Index loads are independent blocking reads; overlap them on a cold cache
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        loaded = list(executor.map(
+            _load_session_index_cached, [str(pd) for pd in project_dirs]
+        ))
+
     results = []
-    for project_dir in projects_dir.iterdir():
-        if not project_dir.is_dir():
-            continue
-        index = _load_session_index(project_dir)
+    for project_dir, (index, _) in zip(project_dirs, loaded):
         if index is not None:
             project_path = index.get("originalPath", decode_project_dir(project_dir.name))
         else:
             project_path = decode_project_dir(project_dir.name)
         project_name = resolve_project_name(project_path)
-        results.append((project_dir, project_name, project_path))
+        results.append((project_dir, project_name, project_path, index))
     return results
 
 
@@ -200,6 +336,79 @@ def _extract_text(obj):
     return ""
 
 
+def _compile_query(query):
+    # type: (str) -> Any
+    """Compile a literal, case-insensitive matcher for query.
+
+    `pattern.search(s)` folds case as it scans instead of allocating a
+    lowercased copy of every string checked.
+    """
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+
+def _prefilter_term(query):
+    # type: (str) -> str
+    """Longest whitespace-free piece of query, for raw-text prefilters.
+
+    Message text joins its text blocks with spaces, so a query containing
+    whitespace can match across blocks that are apart in the raw JSON line.
+    Each whitespace-free piece of such a match still lies inside one block,
+    so prefilters search for the longest piece and leave the full query to
+    the check on extracted text.
+    """
+    parts = query.split()
+    return max(parts, key=len) if parts else query
+
+
+def _message_contains(obj, pattern):
+    # type: (Dict, Any) -> bool
+    """Check whether a message's extracted text matches pattern.
+
+    Mirrors _extract_text, but tests each text block on its own so the
+    common no-match case never builds the joined string.
+    """
+    if isinstance(obj.get("text"), str):
+        text = obj["text"]
+        return bool(text) and pattern.search(text) is not None
+
+    msg = obj.get("message", obj)
+    content = msg.get("content", "")
+
+    if isinstance(content, str):
+        return bool(content) and pattern.search(content) is not None
+
+    if isinstance(content, list):
+        blocks = 0
+        for block in content:
+            if isinstance(block, dict):
+                if block.get("type") != "text":
+                    continue
+                block = block.get("text", "")
+            elif not isinstance(block, str):
+                continue
+            blocks += 1
+            if block and pattern.search(block) is not None:
+                return True
+
+        # A match spanning two blocks must include the joining space
+        if blocks > 1 and " " in pattern.pattern:
+            return pattern.search(_extract_text(obj)) is not None
+
+    return False
+
+
+def _is_noise_line(line):
+    # type: (Any) -> bool
+    """Cheaply spot a raw JSONL line (str or bytes) that is a noise message.
+
+    Only catches lines that start with their type field; anything else is
+    left to _get_message_role after parsing.
+    """
+    if isinstance(line, bytes):
+        return line.startswith(_NOISE_LINE_PREFIXES_BYTES)
+    return line.startswith(_NOISE_LINE_PREFIXES)
+
+
 def _get_message_role(obj):
     # type: (Dict) -> Optional[str]
     """Get the conversation role (user/assistant) from a JSONL object, or None."""
@@ -218,14 +427,27 @@ def _get_message_role(obj):
 # Phase 1: Metadata search
 # ---------------------------------------------------------------------------
 
-def search_metadata(query, claude_dir=DEFAULT_CLAUDE_DIR):
-    # type: (str, Path) -> List[Dict]
+def search_metadata(query, claude_dir=DEFAULT_CLAUDE_DIR, limit=None):
+    # type: (str, Path, Optional[int]) -> List[Dict]
     """Search session summaries and first prompts across all projects."""
-    results = []
-    query_lower = query.lower()
+    # Collect lightweight tuples, sort, and only build dicts for the output
+    hits = []  # type: List[Tuple[str, Dict, str, str, Path, List[str]]]
+    pattern = _compile_query(query)
+
+    # Let rg rule out projects whose index doesn't contain the query at all,
+    # before their indexes are parsed. Only safe when the prefilter term is
+    # stored verbatim in the raw JSON.
+    candidates = None  # type: Optional[Set[str]]
+    if _raw_line_needle(query) is not None and detect_search_tool() == "rg":
+        found = _rg_search_all(
+            _prefilter_term(query), claude_dir / "projects", content=False
+        )
+        if found is not None:
+            candidates = found[0]
 
-    for project_dir, project_name, project_path in _iter_project_dirs(claude_dir):
-        index = _load_session_index(project_dir)
+    for project_dir, project_name, project_path, index in _iter_project_dirs(
+        claude_dir, only=candidates
+    ):
         if index is None:
             continue
 
@@ -234,29 +456,38 @@ def search_metadata(query, claude_dir=DEFAULT_CLAUDE_DIR):
             first_prompt = entry.get("firstPrompt") or ""
 
             match_fields = []
-            if query_lower in summary.lower():
+            if pattern.search(summary):
                 match_fields.append("summary")
-            if query_lower in first_prompt.lower():
+            if pattern.search(first_prompt):
                 match_fields.append("firstPrompt")
 
             if match_fields:
-                results.append({
-                    "sessionId": entry.get("sessionId", ""),
-                    "project": project_name,
-                    "projectPath": project_path,
-                    "projectDir": str(project_dir),
-                    "summary": summary,
-                    "firstPrompt": first_prompt[:300],
-                    "created": entry.get("created", ""),
-                    "modified": entry.get("modified", ""),
-                    "messageCount": entry.get("messageCount", 0),
-                    "gitBranch": entry.get("gitBranch", ""),
-                    "matchFields": match_fields,
-                    "fullPath": entry.get("fullPath", ""),
-                    "isSidechain": entry.get("isSidechain", False),
-                })
-
-    results.sort(key=lambda x: x.get("modified", ""), reverse=True)
+                hits.append((
+                    entry.get("modified", ""), entry, project_name, project_path,
+                    project_dir, match_fields,
+                ))
+
+    hits.sort(key=operator.itemgetter(0), reverse=True)
+    if limit is not None:
+        hits = hits[:limit]
+
+    results = []
+    for modified, entry, project_name, project_path, project_dir, match_fields in hits:
+        results.append({
+            "sessionId": entry.get("sessionId", ""),
+            "project": project_name,
+            "projectPath": project_path,
+            "projectDir": str(project_dir),
+            "summary": entry.get("summary") or "",
+            "firstPrompt": (entry.get("firstPrompt") or "")[:300],
+            "created": entry.get("created", ""),
+            "modified": modified,
+            "messageCount": entry.get("messageCount", 0),
+            "gitBranch": entry.get("gitBranch", ""),
+            "matchFields": match_fields,
+            "fullPath": entry.get("fullPath", ""),
+            "isSidechain": entry.get("isSidechain", False),
+        })
     return results
 
 
@@ -264,29 +495,44 @@ def search_metadata(query, claude_dir=DEFAULT_CLAUDE_DIR):
 # Phase 2: Content search
 # ---------------------------------------------------------------------------
 
+def _filter_project_dirs(claude_dir, project_filter=None):
+    # type: (Path, Optional[str]) -> List[Path]
+    """Project directories whose name contains project_filter (all if None)."""
+    return [
+        project_dir
+        for project_dir, project_name, _, _ in _iter_project_dirs(claude_dir)
+        if not project_filter or project_filter.lower() in project_name.lower()
+    ]
+
+
 def _collect_jsonl_files(claude_dir, project_filter=None, include_subagents=False):
     # type: (Path, Optional[str], bool) -> List[Tuple[str, Path]]
     """Collect JSONL file paths to search, with their project dirs."""
     files = []
 
-    for project_dir, project_name, project_path in _iter_project_dirs(claude_dir):
-        if project_filter and project_filter.lower() not in project_name.lower():
+    for project_dir in _filter_project_dirs(claude_dir, project_filter):
+        # Main session files (directly in project dir); scandir entries
+        # carry their file type, so no extra stat per file
+        session_dirs = []
+        try:
+            with os.scandir(str(project_dir)) as it:
+                for de in it:
+                    if de.name.endswith(".jsonl") and de.is_file():
+                        files.append((de.path, project_dir))
+                    elif include_subagents and de.is_dir():
+                        session_dirs.append(de.path)
+        except OSError:
             continue
 
-        # Main session files (directly in project dir)
-        for f in project_dir.iterdir():
-            if f.suffix == ".jsonl" and f.is_file():
-                files.append((str(f), project_dir))
-
         # Subagent files (nested under session dirs)
-        if include_subagents:
-            for child in project_dir.iterdir():
-                if child.is_dir():
-                    subagent_dir = child / "subagents"
-                    if subagent_dir.exists():
-                        for f in subagent_dir.iterdir():
-                            if f.suffix == ".jsonl":
-                                files.append((str(f), project_dir))
+        for session_dir in session_dirs:
+            try:
+                with os.scandir(os.path.join(session_dir, "subagents")) as it:
+                    for de in it:
+                        if de.name.endswith(".jsonl"):
+                            files.append((de.path, project_dir))
+            except OSError:
+                continue
 
     return files
 
@@ -307,13 +553,14 @@ def _grep_for_matches(query, file_paths, search_tool):
 
         try:
             if search_tool == "rg":
-                cmd = ["rg", "-l", "-i", "--no-messages", "--", query] + batch
+                cmd = ["rg", "--no-config", "-a", "-l", "-i", "-F", "--no-messages",
+                       "--", query] + batch
             else:
                 # Works for both GNU and BSD grep
-                cmd = ["grep", "-l", "-i", "--", query] + batch
+                cmd = ["grep", "--binary-files=text", "-l", "-i", "-F", "--", query] + batch
 
             result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=30
+                cmd, capture_output=True, text=True, timeout=30, env=_search_env(query)
             )
             for line in result.stdout.strip().split("\n"):
                 line = line.strip()
@@ -326,69 +573,471 @@ def _grep_for_matches(query, file_paths, search_tool):
     return matching
 
 
+def _make_ci_finder(needle):
+    # type: (str) -> Optional[Callable[[bytes], bool]]
+    """Build a case-insensitive containment test for raw bytes.
+
+    Folds ASCII case with bytes.translate and searches with bytes.find, both
+    single C passes. Returns None for non-ASCII needles, which bytes can't
+    case-fold.
+    """
+    if not all(ord(c) < 128 for c in needle):
+        return None
+    needle_low = needle.encode("ascii").translate(_ASCII_LOWER)
+    return lambda buf: buf.translate(_ASCII_LOWER).find(needle_low) >= 0
+
+
 def _python_grep(query, file_paths):
     # type: (str, List[str]) -> List[str]
-    """Pure-Python fallback for finding files containing query."""
-    query_lower = query.lower()
+    """Pure-Python fallback for finding files containing query.
+
+    Stops reading a file at its first hit. ASCII queries are searched in
+    chunks that overlap by len(query) - 1 bytes so no match is split.
+    """
+    finder = _make_ci_finder(query)
+    pattern = _compile_query(query)
+    overlap = max(len(query) - 1, 0)
+
     matching = []
     for fp in file_paths:
+        found = False
         try:
-            with open(fp, "r") as f:
-                for line in f:
-                    if query_lower in line.lower():
-                        matching.append(fp)
-                        break
+            with open(fp, "rb") as f:
+                if finder is None:
+                    found = any(
+                        pattern.search(line.decode("utf-8", "replace"))
+                        for line in f
+                    )
+                else:
+                    tail = b""
+                    while not found:
+                        chunk = f.read(READ_BUFFER_SIZE)
+                        if not chunk:
+                            break
+                        buf = tail + chunk
+                        found = finder(buf)
+                        tail = buf[-overlap:] if overlap else b""
         except (IOError, OSError):
             continue
+        if found:
+            matching.append(fp)
     return matching
 
 
+def _rg_search_all(query, root, depth=1, metadata=True, content=True,
+                   include_subagents=False):
+    # type: (str, Path, int, bool, bool, bool) -> Optional[Tuple[Set[str], List[Tuple[str, Path]]]]
+    """Find index and conversation files containing query in one rg walk.
+
+    root is the projects dir (depth=1) or a single project dir (depth=0).
+    rg walks it once with globs for sessions-index.json and/or *.jsonl, and
+    hits are dispatched by filename. Returns (project dirs whose index
+    matches, [(jsonl path, project_dir)]), or None if rg could not be run
+    so callers can fall back.
+    """
+    cmd = ["rg", "--no-config", "-a", "-l", "-i", "-F", "--no-messages", "--no-ignore",
+           "--follow"]
+    if metadata:
+        cmd += ["-g", "sessions-index.json"]
+    if content:
+        cmd += ["-g", "*.jsonl"]
+    if not (content and include_subagents):
+        cmd += ["--max-depth", str(depth + 1)]
+    cmd += ["--", query, str(root)]
+
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=30, env=_search_env(query)
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return None
+
+    index_dirs = set()  # type: Set[str]
+    jsonl_hits = []  # type: List[Tuple[str, Path]]
+    for line in result.stdout.split("\n"):
+        path = line.strip()
+        if not path:
+            continue
+        parts = Path(path).relative_to(root).parts
+        if len(parts) <= depth:
+            continue
+        project_dir = root / parts[0] if depth else root
+        rel = parts[depth:]
+
+        if rel == ("sessions-index.json",):
+            index_dirs.add(str(project_dir))
+        elif rel[-1].endswith(".jsonl"):
+            # Only <session>.jsonl and <session>/subagents/*.jsonl are conversations
+            if len(rel) == 1 or (len(rel) == 3 and rel[1] == "subagents"):
+                jsonl_hits.append((path, project_dir))
+    return index_dirs, jsonl_hits
+
+
+def _extract_matches_via_rg(file_paths, query):
+    # type: (List[str], str) -> Optional[Dict[str, List[Dict]]]
+    """Extract matching messages from files using the lines `rg --json` reports.
+
+    rg only searches for the query's longest whitespace-free piece, so
+    matches spanning text blocks aren't lost. Returns {filepath: matches} in
+    the shape of _extract_content_matches, or None if rg could not be run
+    so callers can fall back to Python.
+    """
+    term = _prefilter_term(query)
+    lines_by_file = {}  # type: Dict[str, List[Tuple[int, str]]]
+    batch_size = 500
+
+    for i in range(0, len(file_paths), batch_size):
+        batch = file_paths[i : i + batch_size]
+        cmd = ["rg", "--no-config", "-a", "--json", "-n", "-i", "-F", "--no-messages",
+               "--", term] + batch
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=1 << 16,
+                env=_search_env(term),
+            )
+        except (FileNotFoundError, OSError):
+            return None
+
+        with proc.stdout:
+            for raw in proc.stdout:
+                try:
+                    event = _json_loads(raw)
+                except ValueError:
+                    continue
+                if event.get("type") != "match":
+                    continue
+                data = event.get("data", {})
+                path = data.get("path", {}).get("text")
+                line = data.get("lines", {}).get("text")
+                if path is None or line is None:
+                    continue
+                lines_by_file.setdefault(path, []).append(
+                    (data.get("line_number", 0), line)
+                )
+        proc.wait()
+
+    return {
+        path: _matches_from_lines(lines, query)
+        for path, lines in lines_by_file.items()
+    }
+
+
+def _matches_from_lines(numbered_lines, query):
+    # type: (Any, str) -> List[Dict]
+    """Extract matching user/assistant messages from (line_number, line) pairs."""
+    matches = []
+    pattern = _compile_query(query)
+
+    for line_num, line in numbered_lines:
+        if _is_noise_line(line):
+            continue
+        try:
+            obj = _json_loads(line)
+        except ValueError:
+            continue
+
+        role = _get_message_role(obj)
+        if role is None or not _message_contains(obj, pattern):
+            continue
+
+        text = _extract_text(obj)
+        matches.append({
+            "role": role,
+            "text": text[:300],
+            "timestamp": obj.get("timestamp", ""),
+            "uuid": obj.get("uuid", ""),
+            "lineNumber": line_num,
+        })
+
+    return matches
+
+
+def _raw_line_needle(query):
+    # type: (str) -> Optional[bytes]
+    """ASCII-lowercased bytes for finding query in raw JSONL, or None if unsafe.
+
+    Uses the query's longest whitespace-free piece (see _prefilter_term),
+    since a match may span text blocks that are apart in the raw line.
+    Only printable ASCII without quotes or backslashes is written verbatim
+    inside a JSON string; anything else may be escaped on disk, so the raw
+    bytes can't be used to rule a line out.
+    """
+    term = _prefilter_term(query)
+    if not term or not all(" " < c <= "~" and c not in '"\\' for c in term):
+        return None
+    return term.encode("ascii").translate(_ASCII_LOWER)
+
+
+def _candidate_lines(buf, needle):
+    # type: (Any, bytes) -> Any
+    """Yield (line_number, line) for each line of buf containing needle.
+
+    buf is walked in line-aligned chunks of READ_BUFFER_SIZE. Each chunk is
+    case-folded once, then bytes.find jumps straight from hit to hit, so
+    only one chunk is ever copied at a time.
+    """
+    size = len(buf)
+    line_num = 1
+    pos = 0
+
+    while pos < size:
+        cut = buf.find(b"\n", min(pos + READ_BUFFER_SIZE, size))
+        cut = size if cut == -1 else cut + 1
+        chunk = buf[pos:cut]
+        folded = chunk.translate(_ASCII_LOWER)
+        counted = 0
+        hit_pos = 0
+
+        while True:
+            hit = folded.find(needle, hit_pos)
+            if hit == -1:
+                break
+            start = folded.rfind(b"\n", 0, hit) + 1
+            end = folded.find(b"\n", hit + len(needle))
+            if end == -1:
+                end = len(folded)
+            line_num += folded.count(b"\n", counted, start)
+            counted = start
+            yield line_num, chunk[start:end]
+            hit_pos = end + 1
+
+        line_num += folded.count(b"\n", counted)
+        pos = cut
+
+
 def _extract_content_matches(filepath, query):
     # type: (str, str) -> List[Dict]
-    """Extract matching user/assistant messages from a JSONL file."""
-    matches = []
-    query_lower = query.lower()
+    """Extract matching user/assistant messages from a JSONL file.
+
+    When the query can be found in the raw bytes, the file is memory-mapped
+    and only lines containing it are JSON-decoded.
+    """
+    needle = _raw_line_needle(query)
 
     try:
-        with open(filepath, "r") as f:
-            for line_num, line in enumerate(f, 1):
+        with open(filepath, "rb", buffering=READ_BUFFER_SIZE) as f:
+            if needle is None:
+                return _matches_from_lines(enumerate(f, 1), query)
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _matches_from_lines(_candidate_lines(mm, needle), query)
+    except (IOError, OSError, ValueError):
+        return []
+
+
+def _find_session_entry(entries_by_stem, filepath):
+    # type: (Dict[str, Dict], str) -> Optional[Dict]
+    """Find the session index entry matching a JSONL filepath."""
+    return entries_by_stem.get(_file_stem(filepath))
+
+
+# ---------------------------------------------------------------------------
+# Content index (SQLite FTS5)
+# ---------------------------------------------------------------------------
+
+_FTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    lines_ingested INTEGER NOT NULL,
+    bytes_ingested INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+    text,
+    role UNINDEXED,
+    file_path UNINDEXED,
+    line_number UNINDEXED,
+    uuid UNINDEXED,
+    timestamp UNINDEXED,
+    tokenize='trigram'
+);
+"""
+
+
+def _ingest_jsonl(conn, path, start_line, start_byte):
+    # type: (sqlite3.Connection, str, int, int) -> Tuple[int, int]
+    """Index complete lines of a JSONL file from a byte offset onwards.
+
+    Returns (lines_ingested, bytes_ingested) to resume from next time. A
+    trailing line without a newline is still being written and is left for
+    a later run.
+    """
+    line_num = start_line
+    offset = start_byte
+    rows = []
+
+    with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+        f.seek(start_byte)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            line_num += 1
+            offset += len(line)
+            if _is_noise_line(line):
+                continue
+            try:
+                obj = _json_loads(line)
+            except ValueError:
+                continue
+
+            role = _get_message_role(obj)
+            if role is None:
+                continue
+
+            text = _extract_text(obj)
+            if not text:
+                continue
+
+            rows.append((
+                text, role, path, line_num,
+                obj.get("uuid", ""), obj.get("timestamp", ""),
+            ))
+
+    conn.executemany(
+        "INSERT INTO messages (text, role, file_path, line_number, uuid, timestamp)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return line_num, offset
+
+
+def _build_fts_index(claude_dir, file_paths):
+    # type: (Path, List[str]) -> Optional[sqlite3.Connection]
+    """Open the content index and bring the given JSONL files up to date.
+
+    file_paths must be resolved absolute paths, so each session is stored
+    once however --claude-dir was spelled. Session files are append-only,
+    so a file that grew is only read from where the last run stopped; one
+    that shrank is re-indexed from scratch. Sessions deleted from disk are
+    dropped from the index. Returns None if the index can't be used (no
+    FTS5/trigram, read-only dir, ...), so callers can fall back to grepping.
+    """
+    try:
+        # Transactions are managed by hand so the write lock can be taken up front
+        conn = sqlite3.connect(
+            str(claude_dir / FTS_INDEX_NAME), timeout=10, isolation_level=None
+        )
+    except sqlite3.Error:
+        return None
+
+    try:
+        conn.executescript(_FTS_SCHEMA)
+        # Hold the write lock while reading resume points, so concurrent
+        # searches can't both ingest the same appended range
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT path, mtime_ns, size, lines_ingested, bytes_ingested FROM files"
+                )
+            }
+
+            # Claude Code prunes old transcripts; don't keep their text around
+            missing = [path for path in known if not os.path.exists(path)]
+            for i in range(0, len(missing), 500):
+                batch = missing[i : i + 500]
+                marks = ",".join("?" * len(batch))
+                conn.execute(
+                    "DELETE FROM messages WHERE file_path IN ({})".format(marks), batch
+                )
+                conn.execute("DELETE FROM files WHERE path IN ({})".format(marks), batch)
+
+            for path in file_paths:
                 try:
-                    obj = json.loads(line)
-                except json.JSONDecodeError:
+                    st = os.stat(path)
+                except OSError:
                     continue
 
-                role = _get_message_role(obj)
-                if role is None:
+                prev = known.get(path)
+                if prev is not None and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
                     continue
 
-                text = _extract_text(obj)
-                if not text or query_lower not in text.lower():
+                if prev is not None and st.st_size >= prev[3]:
+                    start_line, start_byte = prev[2], prev[3]
+                else:
+                    conn.execute("DELETE FROM messages WHERE file_path = ?", (path,))
+                    start_line, start_byte = 0, 0
+
+                try:
+                    lines, offset = _ingest_jsonl(conn, path, start_line, start_byte)
+                except (IOError, OSError):
                     continue
 
-                matches.append({
-                    "role": role,
-                    "text": text[:300],
-                    "timestamp": obj.get("timestamp", ""),
-                    "uuid": obj.get("uuid", ""),
-                    "lineNumber": line_num,
-                })
-    except (IOError, OSError):
-        pass
+                conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (path, st.st_mtime_ns, st.st_size, lines, offset),
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.close()
+        return None
 
-    return matches
+    return conn
 
 
-def _find_session_entry(index_data, filepath):
-    # type: (Dict, str) -> Optional[Dict]
-    """Find the session index entry matching a JSONL filepath."""
-    stem = Path(filepath).stem
-    for entry in index_data.get("entries", []):
-        if entry.get("sessionId", "") == stem:
-            return entry
-        full = entry.get("fullPath", "")
-        if full and Path(full).stem == stem:
-            return entry
-    return None
+def _fts_search(query, claude_dir, file_paths):
+    # type: (str, Path, List[str]) -> Optional[Dict[str, List[Dict]]]
+    """Find matching messages via the content index, grouped by file.
+
+    Only files in file_paths are refreshed and returned. Queries too short
+    for a trigram MATCH are answered by a LIKE scan over the already
+    extracted text, which still skips all JSON parsing. Returns None if the
+    index is unavailable, or for short non-ASCII queries (LIKE only folds
+    ASCII case).
+    """
+    short = len(query) < FTS_MIN_QUERY_LEN
+    if short and not all(ord(c) < 128 for c in query):
+        return None
+
+    # Index rows are keyed on resolved paths; results use the caller's form
+    resolved = {os.path.realpath(fp): fp for fp in file_paths}
+    conn = _build_fts_index(claude_dir, list(resolved))
+    if conn is None:
+        return None
+
+    pattern = _compile_query(query)
+    hits = {}  # type: Dict[str, List[Dict]]
+
+    if short:
+        like = re.sub(r"([\\%_])", r"\\\1", query)
+        where, arg = "text LIKE ? ESCAPE '\\'", "%{}%".format(like)
+    else:
+        where, arg = "text MATCH ?", '"{}"'.format(query.replace('"', '""'))
+
+    try:
+        rows = conn.execute(
+            "SELECT file_path, role, text, timestamp, uuid, line_number"
+            " FROM messages WHERE " + where + " ORDER BY file_path, line_number",
+            (arg,),
+        )
+        for file_path, role, text, timestamp, uuid, line_number in rows:
+            # Trigram matching is case-folded by SQLite; re-check in Python
+            # so results agree exactly with the grep path
+            caller_path = resolved.get(file_path)
+            if caller_path is None or not pattern.search(text):
+                continue
+            hits.setdefault(caller_path, []).append({
+                "role": role,
+                "text": text[:300],
+                "timestamp": timestamp,
+                "uuid": uuid,
+                "lineNumber": line_number,
+            })
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+    return hits
 
 
 def search_content(
@@ -399,40 +1048,89 @@ def search_content(
     before=None,
     limit=20,
     include_subagents=False,
+    use_index=True,
 ):
-    # type: (str, Path, Optional[str], Optional[str], Optional[str], int, bool) -> List[Dict]
-    """Search conversation content across JSONL files."""
-    search_tool = detect_search_tool()
-    file_tuples = _collect_jsonl_files(claude_dir, project, include_subagents)
-
-    if not file_tuples:
-        return []
+    # type: (str, Path, Optional[str], Optional[str], Optional[str], int, bool, bool) -> List[Dict]
+    """Search conversation content across JSONL files.
 
-    file_paths = [fp for fp, _ in file_tuples]
-    file_to_project = {fp: pd for fp, pd in file_tuples}
-
-    matching_files = _grep_for_matches(query, file_paths, search_tool)
-
-    results = []
-    for filepath in matching_files[:limit]:
+    Uses the SQLite content index when possible; `use_index=False` (or an
+    unusable index) greps the files directly instead.
+    """
+    # Matching messages per file, when already known without a Python re-scan
+    file_matches = None  # type: Optional[Dict[str, List[Dict]]]
+    file_to_project = {}  # type: Dict[str, Path]
+
+    # Prefer the content index: it only re-reads files that changed
+    if use_index:
+        file_tuples = _collect_jsonl_files(claude_dir, project, include_subagents)
+        file_to_project = {fp: pd for fp, pd in file_tuples}
+        file_matches = _fts_search(query, claude_dir, list(file_to_project))
+
+    if file_matches is not None:
+        matching_files = list(file_matches)
+    else:
+        search_tool = detect_search_tool()
+        term = _prefilter_term(query)
+
+        # Stage 1: cheaply narrow to files that could contain the query.
+        # With rg, let it do the directory walk: one walk over all projects,
+        # or one per project when a project filter picks a subset.
+        matching_files = None  # type: Optional[List[str]]
+        if search_tool == "rg":
+            if project:
+                roots = [(pd, 0) for pd in _filter_project_dirs(claude_dir, project)]
+            else:
+                roots = [(claude_dir / "projects", 1)]
+
+            matching_files = []
+            for root, depth in roots:
+                found = _rg_search_all(
+                    term, root, depth, metadata=False,
+                    include_subagents=include_subagents,
+                )
+                if found is None:
+                    matching_files = None
+                    break
+                for fp, project_dir in found[1]:
+                    matching_files.append(fp)
+                    file_to_project[fp] = project_dir
+
+        if matching_files is None:
+            file_tuples = _collect_jsonl_files(claude_dir, project, include_subagents)
+
+            if not file_tuples:
+                return []
+
+            file_paths = [fp for fp, _ in file_tuples]
+            file_to_project = {fp: pd for fp, pd in file_tuples}
+
+            matching_files = _grep_for_matches(term, file_paths, search_tool)
+
+        # Stage 2: pull matching lines for the surviving candidates only
+        if search_tool == "rg":
+            file_matches = _extract_matches_via_rg(matching_files[: limit * 2], query)
+
+    def _process_match_file(filepath):
+        # type: (str) -> Optional[Dict]
+        """Build the result for one matching file, or None if it is filtered out."""
         project_dir = file_to_project.get(filepath)
         if not project_dir:
-            continue
+            return None
 
         # Get project + session metadata
-        index = _load_session_index(project_dir)
+        index, entries_by_stem = _load_session_index_cached(str(project_dir))
         project_path = ""
         project_name = "unknown"
         session_summary = ""
         session_created = ""
-        session_id = Path(filepath).stem
+        session_id = _file_stem(filepath)
         message_count = 0
         git_branch = ""
 
         if index:
             project_path = index.get("originalPath", "")
             project_name = resolve_project_name(project_path)
-            entry = _find_session_entry(index, filepath)
+            entry = _find_session_entry(entries_by_stem, filepath)
             if entry:
                 session_summary = entry.get("summary", "")
                 session_created = entry.get("created", "")
@@ -442,18 +1140,21 @@ def search_content(
 
         # Apply date filters
         if after and session_created and session_created < after:
-            continue
+            return None
         if before and session_created and session_created > before:
-            continue
+            return None
 
         # Extract the actual matching conversation turns
-        matches = _extract_content_matches(filepath, query)
+        if file_matches is not None:
+            matches = file_matches.get(filepath, [])
+        else:
+            matches = _extract_content_matches(filepath, query)
         if not matches:
-            continue
+            return None
 
         is_subagent = "/subagents/" in filepath
 
-        results.append({
+        return {
             "sessionId": session_id,
             "project": project_name,
             "projectPath": project_path,
@@ -466,7 +1167,14 @@ def search_content(
             "isSubagent": is_subagent,
             "matches": matches[:5],
             "matchCount": len(matches),
-        })
+        }
+
+    # Per-file work is independent blocking I/O + JSON parsing, so overlap it.
+    # Oversample candidates since date filters and role checks drop some.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        processed = executor.map(_process_match_file, matching_files[: limit * 2])
+        results = [r for r in processed if r is not None][:limit]
 
     results.sort(key=lambda x: x.get("created", ""), reverse=True)
     return results
@@ -476,55 +1184,235 @@ def search_content(
 # Phase 3: Context extraction
 # ---------------------------------------------------------------------------
 
+def _ensure_offset_index(session_file):
+    # type: (str) -> Optional[array]
+    """Load or extend the line-offset sidecar for a session file.
+
+    Returns an array where offsets[n - 1] is the byte offset of line n and
+    the last element is the end of the last complete line. Session files
+    are append-only, so only the bytes past the last known line are read;
+    a sidecar that doesn't fit the file (not strictly increasing, past its
+    end, or not ending on a line boundary) is rebuilt. The sidecar is
+    replaced atomically, so concurrent callers never see a torn write. If
+    it can't be written the offsets are still returned. Returns None if the
+    session can't be read.
+    """
+    sidecar = session_file + OFFSETS_SUFFIX
+    try:
+        size = os.stat(session_file).st_size
+    except OSError:
+        return None
+
+    offsets = array("Q")
+    try:
+        with open(sidecar, "rb") as f:
+            offsets.frombytes(f.read())
+    except (IOError, OSError, ValueError):
+        offsets = array("Q")
+
+    if not _offsets_fit(session_file, offsets, size):
+        offsets = array("Q", [0])
+
+    known = len(offsets)
+    if offsets[-1] < size:
+        pos = offsets[-1]
+        try:
+            with open(session_file, "rb", buffering=READ_BUFFER_SIZE) as f:
+                f.seek(pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    pos += len(line)
+                    offsets.append(pos)
+        except (IOError, OSError):
+            return None
+
+    if len(offsets) > known:
+        _write_offsets(sidecar, offsets)
+
+    return offsets
+
+
+def _offsets_fit(session_file, offsets, size):
+    # type: (str, array, int) -> bool
+    """Whether a loaded sidecar is plausible for a session file of size bytes.
+
+    Offsets must start at 0, strictly increase, and end on a line boundary
+    no further than the end of the file.
+    """
+    if not offsets or offsets[0] != 0 or offsets[-1] > size:
+        return False
+    if any(a >= b for a, b in zip(offsets, offsets[1:])):
+        return False
+    return offsets[-1] == 0 or _follows_newline(session_file, offsets[-1])
+
+
+def _follows_newline(session_file, offset):
+    # type: (str, int) -> bool
+    """Whether offset is the start of a line in session_file."""
+    if offset == 0:
+        return True
+    try:
+        with open(session_file, "rb") as f:
+            f.seek(offset - 1)
+            return f.read(1) == b"\n"
+    except (IOError, OSError):
+        return False
+
+
+def _write_offsets(sidecar, offsets):
+    # type: (str, array) -> None
+    """Atomically replace the sidecar with offsets; failures are ignored."""
+    try:
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(sidecar) or ".",
+            prefix=os.path.basename(sidecar) + ".",
+            suffix=".tmp",
+        )
+    except (IOError, OSError):
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(offsets.tobytes())
+        os.replace(tmp, sidecar)
+    except (IOError, OSError):
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _context_message(line_num, line):
+    # type: (int, bytes) -> Optional[Dict]
+    """Parse a JSONL line into a context turn, or None if it isn't one."""
+    if _is_noise_line(line):
+        return None
+    try:
+        obj = _json_loads(line)
+    except ValueError:
+        return None
+
+    role = _get_message_role(obj)
+    if role is None:
+        return None
+
+    text = _extract_text(obj)
+    if not text:
+        return None
+
+    return {
+        "role": role,
+        "text": text[:2000],
+        "timestamp": obj.get("timestamp", ""),
+        "uuid": obj.get("uuid", ""),
+        "lineNumber": line_num,
+    }
+
+
+def _context_at_line(session_file, offsets, line_number, turns):
+    # type: (str, array, int, int) -> Optional[List[Dict]]
+    """Collect turns around line_number, reading only a window of the file.
+
+    Starts a little before the target and widens the window until it holds
+    `turns` earlier messages (or reaches line 1). Returns None if the
+    target line isn't a conversation turn, or if the sidecar offset for
+    the window start isn't on a line boundary.
+    """
+    back = turns * 2 + 10
+    while True:
+        start_line = max(1, line_number - back)
+        before = []  # type: List[Dict]
+        context = None  # type: Optional[List[Dict]]
+        after_left = 0
+
+        if not _follows_newline(session_file, offsets[start_line - 1]):
+            return None
+
+        with open(session_file, "rb", buffering=READ_BUFFER_SIZE) as f:
+            f.seek(offsets[start_line - 1])
+            for line_num, line in enumerate(f, start_line):
+                message = _context_message(line_num, line)
+                if message is None:
+                    if line_num == line_number:
+                        return None
+                    continue
+
+                if context is not None:
+                    context.append(message)
+                    after_left -= 1
+                    if after_left <= 0:
+                        break
+                elif line_num == line_number:
+                    context = (before[-turns:] if turns > 0 else []) + [message]
+                    after_left = turns
+                    if after_left <= 0:
+                        break
+                else:
+                    before.append(message)
+
+        if context is None:
+            return None
+        if len(before) >= turns or start_line == 1:
+            return context
+        back *= 2
+
+
 def extract_context(session_file, line_number=None, uuid=None, turns=3):
     # type: (str, Optional[int], Optional[str], int) -> List[Dict]
     """Extract conversation turns around a specific match point.
 
     Returns conversation turns (user/assistant only) within `turns`
-    messages of the target line/uuid.
+    messages of the target line/uuid. A line target seeks straight to its
+    neighbourhood via the offsets sidecar; otherwise the file is read from
+    the start, stopping once the turns after the target are collected.
     """
-    messages = []
-    target_idx = None
+    turns = max(turns, 0)
+
+    if line_number is not None and uuid is None and line_number >= 1:
+        offsets = _ensure_offset_index(session_file)
+        if offsets is not None and line_number < len(offsets):
+            try:
+                context = _context_at_line(session_file, offsets, line_number, turns)
+            except (IOError, OSError):
+                return []
+            if context is not None:
+                return context
+
+    # Rolling window of the latest messages: the turns before the target,
+    # or the fallback result if the target is never found
+    recent = collections.deque(maxlen=turns * 2)  # type: Any
+    context = None  # type: Optional[List[Dict]]
+    after_left = 0
 
     try:
-        with open(session_file, "r") as f:
+        with open(session_file, "rb", buffering=READ_BUFFER_SIZE) as f:
             for line_num, line in enumerate(f, 1):
-                try:
-                    obj = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                role = _get_message_role(obj)
-                if role is None:
-                    continue
-
-                text = _extract_text(obj)
-                if not text:
+                message = _context_message(line_num, line)
+                if message is None:
                     continue
 
-                idx = len(messages)
-                messages.append({
-                    "role": role,
-                    "text": text[:2000],
-                    "timestamp": obj.get("timestamp", ""),
-                    "uuid": obj.get("uuid", ""),
-                    "lineNumber": line_num,
-                })
-
-                if line_number is not None and line_num == line_number:
-                    target_idx = idx
-                elif uuid and obj.get("uuid") == uuid:
-                    target_idx = idx
+                if context is not None:
+                    context.append(message)
+                    after_left -= 1
+                    if after_left <= 0:
+                        break
+                elif (line_number is not None and line_num == line_number) or (
+                    uuid and message["uuid"] == uuid
+                ):
+                    context = (list(recent)[-turns:] if turns > 0 else []) + [message]
+                    after_left = turns
+                    if after_left <= 0:
+                        break
+                else:
+                    recent.append(message)
     except (IOError, OSError):
         return []
 
-    if target_idx is None:
+    if context is None:
         # No target — return last N turns as fallback
-        return messages[-(turns * 2) :] if messages else []
+        return list(recent)
 
-    start = max(0, target_idx - turns)
-    end = min(len(messages), target_idx + turns + 1)
-    return messages[start:end]
+    return context
 
 
 # ---------------------------------------------------------------------------
@@ -536,8 +1424,7 @@ def list_projects(claude_dir=DEFAULT_CLAUDE_DIR):
     """List all projects with session counts and activity info."""
     results = []
 
-    for project_dir, project_name, project_path in _iter_project_dirs(claude_dir):
-        index = _load_session_index(project_dir)
+    for project_dir, project_name, project_path, index in _iter_project_dirs(claude_dir):
         if index is None:
             continue
 
@@ -588,6 +1475,9 @@ def main():
         "metadata", help="Search session metadata (summaries, first prompts)"
     )
     p_meta.add_argument("query", help="Search query")
+    p_meta.add_argument(
+        "--limit", type=int, default=None, help="Max session results (default: all)"
+    )
 
     # -- content --
     p_content = subparsers.add_parser(
@@ -605,6 +1495,11 @@ def main():
         action="store_true",
         help="Include sub-agent conversations",
     )
+    p_content.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Grep JSONL files directly instead of using the content index",
+    )
 
     # -- context --
     p_ctx = subparsers.add_parser(
@@ -630,7 +1525,7 @@ def main():
     args = parser.parse_args()
 
     if args.command == "metadata":
-        results = search_metadata(args.query, args.claude_dir)
+        results = search_metadata(args.query, args.claude_dir, limit=args.limit)
         json.dump(results, sys.stdout, indent=2)
         print()  # trailing newline
 
@@ -643,6 +1538,7 @@ def main():
             before=args.before,
             limit=args.limit,
             include_subagents=args.include_subagents,
+            use_index=not args.no_index,
         )
         json.dump(results, sys.stdout, indent=2)
         print()
@@ -3,6 +3,8 @@ set -euo pipefail
 
 TARGET="$HOME/.claude/skills/recall"
 RECALLS_DIR="$HOME/.claude/recalls"
+FTS_INDEX="$HOME/.claude/.recall-fts.sqlite"
+PROJECTS_DIR="$HOME/.claude/projects"
 
 if [ -L "$TARGET" ]; then
     rm "$TARGET"
@@ -18,6 +20,14 @@ if [ "${1:-}" = "--purge" ]; then
         rm -rf "$RECALLS_DIR"
         echo "Removed saved recalls: $RECALLS_DIR"
     fi
+    if [ -f "$FTS_INDEX" ]; then
+        rm -f "$FTS_INDEX"
+        echo "Removed search index: $FTS_INDEX"
+    fi
+    if [ -d "$PROJECTS_DIR" ]; then
+        find "$PROJECTS_DIR" -name '*.jsonl.offsets' -type f -delete
+        echo "Removed line-offset sidecars under $PROJECTS_DIR"
+    fi
 else
     if [ -d "$RECALLS_DIR" ]; then
         echo "Saved recalls preserved at $RECALLS_DIR (use --purge to remove)"